@@ -1,8 +1,7 @@
 import os
-import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy.exc import DisconnectionError, InterfaceError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,20 +11,29 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if DATABASE_URL and DATABASE_URL.startswith("postgresql://"):
     DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
 
+# DB_POOL_SIZE and DB_MAX_OVERFLOW are budgets for the whole deployment; every uvicorn worker
+# builds its own engine, so each one takes an equal share of the server's connection limit
+WEB_CONCURRENCY = max(int(os.getenv("WEB_CONCURRENCY", "1")), 1)
+DB_POOL_SIZE = max(int(os.getenv("DB_POOL_SIZE", "20")) // WEB_CONCURRENCY, 1)
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "40")) // WEB_CONCURRENCY
+
 engine = create_async_engine(
     DATABASE_URL, 
-    echo=True,
-    pool_size=20,
-    max_overflow=30,
+    poolclass=AsyncAdaptedQueuePool,  # asyncio-safe queue pool; a plain QueuePool breaks asyncpg
+    echo=os.getenv("DB_ECHO", "false").lower() == "true",  # SQL logging is expensive, keep it opt-in
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
     pool_timeout=30,
-    pool_recycle=3600,
-    pool_pre_ping=True
+    pool_recycle=1800,
+    pool_pre_ping=True,
+    pool_use_lifo=True  # Reuse the most recent connections so idle extras can be recycled
 )
 AsyncSessionLocal = async_sessionmaker(
     autocommit=False,
     autoflush=False,
     bind=engine,
-    class_=AsyncSession
+    class_=AsyncSession,
+    expire_on_commit=False  # Objects stay readable after commit without a reload round-trip
 )
 
 
@@ -34,24 +42,14 @@ class Base(DeclarativeBase):
 
 
 async def get_db():
-    max_retries = 3
-    retry_delay = 1
-    
-    for attempt in range(max_retries):
+    # pool_pre_ping replaces dead connections on checkout, so no manual retry is needed here
+    async with AsyncSessionLocal() as session:
         try:
-            async with AsyncSessionLocal() as session:
-                yield session
-                await session.commit()
-                return
-        except (DisconnectionError, InterfaceError) as e:
-            if attempt < max_retries - 1:
-                await asyncio.sleep(retry_delay * (attempt + 1))
-                continue
-            raise
+            yield session
+            await session.commit()
         except Exception:
-            async with AsyncSessionLocal() as session:
-                await session.rollback()
-                raise
+            await session.rollback()
+            raise
 
 
 async def init_db():
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, BigInteger, Boolean, ForeignKey, Enum, UniqueConstraint, Float
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, Boolean, ForeignKey, Enum, UniqueConstraint, Float, Index, LargeBinary, Computed
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -138,13 +138,27 @@ class Translation(Base):
     __tablename__ = "translations"
 
     id = Column(Integer, primary_key=True, index=True)
-    input_text = Column(String, nullable=False)
+    input_text = Column(String, nullable=False)  # Kept for audit, never indexed
+    input_hash = Column(LargeBinary, Computed("decode(md5(input_text), 'hex')", persisted=True), nullable=False)  # 16-byte lookup key
     target_language = Column(String, nullable=False)  # 'uz' or 'ru'
     output_text = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Unique constraint: same input + target language should return cached result
-    __table_args__ = (UniqueConstraint('input_text', 'target_language', name='unique_translation'),)
+    __table_args__ = (UniqueConstraint('input_hash', 'target_language', name='unique_translation'),)
+
+
+class TranslationBatch(Base):
+    __tablename__ = "translation_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    openai_batch_id = Column(String, unique=True, nullable=False)
+    input_file_id = Column(String, nullable=False)  # Uploaded JSONL, used to map results back to inputs
+    status = Column(String, nullable=False)  # OpenAI batch status (validating, in_progress, completed, ...)
+    request_count = Column(Integer, nullable=False)
+    imported_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
 
 class UserSubscription(Base):
@@ -166,6 +180,12 @@ class UserSubscription(Base):
     user = relationship("User", foreign_keys=[user_id])
     created_by = relationship("User", foreign_keys=[created_by_admin_id])
 
+    # Partial indexes over active rows: active-subscription lookup and revenue aggregation
+    __table_args__ = (
+        Index('idx_usersub_active', 'user_id', end_date.desc(), postgresql_where=(is_active == True)),
+        Index('idx_usersub_created_active', 'created_at', postgresql_where=(is_active == True)),
+    )
+
 
 class BusinessProfile(Base):
     __tablename__ = "business_profile"
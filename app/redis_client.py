@@ -1,8 +1,10 @@
 import os
 import json
+import asyncio
+import hashlib
 import redis.asyncio as redis
 from dotenv import load_dotenv
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
 
 load_dotenv()
 
@@ -386,22 +388,27 @@ async def invalidate_grammars_cache_by_pack(pack_id: int):
 
 
 # Subscription caching
-async def set_user_subscription_cache(user_id: int, subscription_data: Dict[str, Any]):
-    """Store user subscription data in Redis cache"""
+# One hash per user with a field per app version, so invalidation is a single DEL
+async def set_user_subscription_cache(user_id: int, app_version: str, subscription_data: Dict[str, Any]):
+    """Store user subscription status for an app version in Redis cache"""
     if redis_client:
         try:
-            await redis_client.setex(f"subscription:user:{user_id}", 300, json.dumps(subscription_data, default=str))  # 5 min
+            key = f"subscription:user:{user_id}"
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.hset(key, app_version, json.dumps(subscription_data, default=str))
+                pipe.expire(key, 60)  # 1 min
+                await pipe.execute()
             return True
         except Exception as e:
             print(f"Redis subscription cache set error: {e}")
     return False
 
 
-async def get_user_subscription_cache(user_id: int) -> Dict[str, Any]:
-    """Get user subscription data from Redis cache"""
+async def get_user_subscription_cache(user_id: int, app_version: str) -> Dict[str, Any]:
+    """Get user subscription status for an app version from Redis cache"""
     if redis_client:
         try:
-            data = await redis_client.get(f"subscription:user:{user_id}")
+            data = await redis_client.hget(f"subscription:user:{user_id}", app_version)
             if data:
                 return json.loads(data.decode())
         except Exception as e:
@@ -410,7 +417,7 @@ async def get_user_subscription_cache(user_id: int) -> Dict[str, Any]:
 
 
 async def invalidate_user_subscription_cache(user_id: int):
-    """Remove user subscription data from Redis cache"""
+    """Remove user subscription status for all app versions from Redis cache"""
     if redis_client:
         try:
             await redis_client.delete(f"subscription:user:{user_id}")
@@ -454,6 +461,93 @@ async def invalidate_subscriptions_list_cache():
     return False
 
 
+# Translation caching
+def translation_cache_key(input_text: str, target_language: str) -> str:
+    """Build fixed-size translation cache key from input text and target language"""
+    digest = hashlib.blake2b(input_text.encode(), digest_size=16).hexdigest()
+    return f"translation:{target_language}:{digest}"
+
+
+async def set_translation_cache(input_text: str, target_language: str, output_text: str):
+    """Store translated text in Redis cache"""
+    if redis_client:
+        try:
+            await redis_client.setex(translation_cache_key(input_text, target_language), 86400, output_text)  # 24 hours
+            return True
+        except Exception as e:
+            print(f"Redis translation cache set error: {e}")
+    return False
+
+
+async def get_translation_cache(input_text: str, target_language: str) -> str:
+    """Get translated text from Redis cache"""
+    if redis_client:
+        try:
+            data = await redis_client.get(translation_cache_key(input_text, target_language))
+            return data.decode() if data else None
+        except Exception as e:
+            print(f"Redis translation cache get error: {e}")
+    return None
+
+
+# Rate limiting
+async def increment_rate_limit(key: str, window_seconds: int) -> int:
+    """Count a request in the current fixed window, return requests seen so far (0 if Redis unavailable)"""
+    if redis_client:
+        try:
+            # SET NX starts the window with its TTL in the same MULTI as the INCR, so a failure
+            # between the two commands can never leave a counter without an expiry
+            async with redis_client.pipeline(transaction=True) as pipe:
+                pipe.set(f"ratelimit:{key}", 0, ex=window_seconds, nx=True)
+                pipe.incr(f"ratelimit:{key}")
+                _, count = await pipe.execute()
+            return count
+        except Exception as e:
+            print(f"Redis rate limit error: {e}")
+    return 0
+
+
+# Cross-instance cache invalidation
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+async def publish_cache_invalidation(event: Dict[str, Any]):
+    """Publish a cache invalidation event to all app instances"""
+    if redis_client:
+        try:
+            await redis_client.publish(CACHE_INVALIDATION_CHANNEL, json.dumps(event, default=str))
+            return True
+        except Exception as e:
+            print(f"Redis cache invalidation publish error: {e}")
+    return False
+
+
+async def listen_cache_invalidations(
+        handler: Callable[[Dict[str, Any]], None],
+        on_subscribe: Optional[Callable[[], None]] = None
+):
+    """Subscribe to cache invalidation events and pass each one to handler (runs until cancelled)
+
+    on_subscribe runs after every (re)subscription, since events published while disconnected are lost
+    """
+    if not redis_client:
+        return
+    while True:
+        try:
+            async with redis_client.pubsub() as pubsub:
+                await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                if on_subscribe:
+                    on_subscribe()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        handler(json.loads(message["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Redis cache invalidation listener error: {e}")
+            await asyncio.sleep(5)
+
+
 async def close_redis():
     """Close Redis connection"""
     if redis_client:
@@ -39,12 +39,12 @@ async def send_code(request: SendCodeRequest, db: AsyncSession = Depends(get_db)
             detail="Authentication service temporarily unavailable for this account"
         )
     
-    user_result = await db.execute(
-        select(User).where(User.phone_number == phone_number)
+    # Only the chat id is needed to deliver the code
+    telegram_id = await db.scalar(
+        select(User.telegram_id).where(User.phone_number == phone_number)
     )
-    user = user_result.scalar_one_or_none()
     
-    if not user:
+    if telegram_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found. Please register via Telegram bot first."
@@ -54,7 +54,7 @@ async def send_code(request: SendCodeRequest, db: AsyncSession = Depends(get_db)
     
     await set_otp_code(phone_number, temp_code, 300)
     
-    success = await send_code_to_user(phone_number, temp_code)
+    success = await send_code_to_user(phone_number, temp_code, telegram_id=telegram_id)
     
     if not success:
         raise HTTPException(
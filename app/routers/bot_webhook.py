@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Header, HTTPException, Request, status
+from typing import Optional
+import secrets
+
+from app.telegram_bot import WEBHOOK_SECRET, process_webhook_update
+
+router = APIRouter()
+
+
+@router.post("/webhook")
+async def telegram_webhook(
+        request: Request,
+        x_telegram_bot_api_secret_token: Optional[str] = Header(None)
+):
+    """Receive bot updates pushed by Telegram (USE_WEBHOOK mode)"""
+    if not WEBHOOK_SECRET or not secrets.compare_digest(
+            (x_telegram_bot_api_secret_token or "").encode(), WEBHOOK_SECRET.encode()
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid webhook secret")
+
+    if not await process_webhook_update(await request.json()):
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Bot is not running")
+
+    return {"ok": True}
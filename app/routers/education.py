@@ -13,9 +13,11 @@ from app.schemas import (
     StudentContentResponse, ModuleWithProgress, LessonWithProgress,
     LessonPacksResponse, PackWithProgress, PackUserProgress,
     PackWordsResponse, WordSimple, PackWordsUserProgress,
-    PackGrammarResponse, GrammarQuestion, GrammarTopicSimple, PackGrammarUserProgress
+    PackGrammarResponse, GrammarQuestion, GrammarTopicMinimal, PackGrammarUserProgress,
+    MODULE_LIST_ADAPTER, LESSON_LIST_ADAPTER, PACK_LIST_ADAPTER
 )
 from app.dependencies import get_current_user, get_admin_user
+from app.utils import list_response
 from app.redis_client import (
     get_lessons_cache, set_lessons_cache, invalidate_lessons_cache,
     get_modules_cache, set_modules_cache, invalidate_modules_cache,
@@ -389,7 +391,7 @@ async def get_pack_grammar(
     
     # Convert grammar topics to simple format
     topic_list = [
-        GrammarTopicSimple(
+        GrammarTopicMinimal(
             id=topic.id,
             video_url=topic.video_url,
             markdown_text=topic.markdown_text
@@ -420,7 +422,7 @@ async def get_modules(current_user: User = Depends(get_current_user), db: AsyncS
     # Try cache first
     cached_data = await get_modules_cache()
     if cached_data:
-        return cached_data
+        return list_response(MODULE_LIST_ADAPTER, cached_data)
     
     # Get from database and cache
     result = await db.execute(select(Module).order_by(Module.order))
@@ -439,7 +441,7 @@ async def get_modules(current_user: User = Depends(get_current_user), db: AsyncS
     ]
     
     await set_modules_cache(modules_data)
-    return modules_data
+    return list_response(MODULE_LIST_ADAPTER, modules_data)
 
 
 @router.get("/modules/{module_id}", response_model=ModuleSchema)
@@ -532,7 +534,7 @@ async def get_lessons_by_module(module_id: Optional[int] = Query(None), current_
     if module_id:
         cached_data = await get_lessons_cache_by_module(module_id)
         if cached_data:
-            return cached_data
+            return list_response(LESSON_LIST_ADAPTER, cached_data)
     
     query = select(Lesson).order_by(Lesson.order)
     if module_id:
@@ -559,7 +561,7 @@ async def get_lessons_by_module(module_id: Optional[int] = Query(None), current_
     if module_id:
         await set_lessons_cache_by_module(module_id, lessons_data)
     
-    return lessons_data
+    return list_response(LESSON_LIST_ADAPTER, lessons_data)
 
 
 @router.get("/lessons/{lesson_id}", response_model=LessonSchema)
@@ -660,7 +662,7 @@ async def get_packs(lesson_id: Optional[int] = Query(None), current_user: User =
     if lesson_id:
         cached_data = await get_packs_cache_by_lesson(lesson_id)
         if cached_data:
-            return cached_data
+            return list_response(PACK_LIST_ADAPTER, cached_data)
     
     query = select(Pack).order_by(Pack.id)
     if lesson_id:
@@ -694,7 +696,7 @@ async def get_packs(lesson_id: Optional[int] = Query(None), current_user: User =
     if lesson_id:
         await set_packs_cache_by_lesson(lesson_id, packs_data)
     
-    return packs_data
+    return list_response(PACK_LIST_ADAPTER, packs_data)
 
 
 @router.get("/packs/{pack_id}", response_model=PackSchema)
@@ -90,6 +90,7 @@ async def get_video_url_by_topic_id(topic_id: int, telegram_id: int = Query(...)
             )
         )
         .order_by(UserSubscription.end_date.desc())
+        .limit(1)
     )
     active_subscription = subscription_result.scalars().first()
     
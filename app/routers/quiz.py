@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form
-from sqlalchemy import select
+from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from typing import List, Dict, Any, Optional
@@ -12,9 +12,12 @@ from app.models import Pack, Word, Grammar, PackType, GrammarType, User, UserPro
 from app.schemas import (
     Word as WordSchema, WordCreate, WordUpdate,
     Grammar as GrammarSchema, GrammarCreate, GrammarUpdate,
-    QuizResponse, WordQuizResult, GrammarQuizResult, QuizResultResponse
+    QuizResponse, WordQuizResult, GrammarQuizResult, QuizResultResponse,
+    WORD_LIST_ADAPTER, GRAMMAR_LIST_ADAPTER
 )
 from app.dependencies import get_current_user, get_admin_user
+from app.utils import list_response
+from app.routers.translation import refresh_glossary
 from app.redis_client import (
     get_quiz_cache, set_quiz_cache, invalidate_quiz_cache,
     get_words_cache_by_pack, set_words_cache_by_pack, invalidate_words_cache_by_pack,
@@ -83,7 +86,7 @@ async def get_words(pack_id: Optional[int] = Query(None), current_user: User = D
     if pack_id:
         cached_data = await get_words_cache_by_pack(pack_id)
         if cached_data:
-            return cached_data
+            return list_response(WORD_LIST_ADAPTER, cached_data)
     
     query = select(Word).order_by(Word.id)
     if pack_id:
@@ -110,7 +113,7 @@ async def get_words(pack_id: Optional[int] = Query(None), current_user: User = D
     if pack_id:
         await set_words_cache_by_pack(pack_id, words_data)
     
-    return words_data
+    return list_response(WORD_LIST_ADAPTER, words_data)
 
 
 @router.get("/words/{word_id}", response_model=WordSchema)
@@ -139,6 +142,7 @@ async def create_word(word: WordCreate, admin_user: User = Depends(get_admin_use
     await db.commit()
     await db.refresh(db_word)
     await invalidate_words_cache_by_pack(word.pack_id)
+    await refresh_glossary()
     return db_word
 
 
@@ -151,26 +155,30 @@ async def update_word(word_id: int, word_update: WordUpdate, admin_user: User =
     if not word:
         raise HTTPException(status_code=404, detail="Word not found")
 
-    for field, value in word_update.dict(exclude_unset=True).items():
+    update_data = word_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
         setattr(word, field, value)
 
     await db.commit()
     await db.refresh(word)
     await invalidate_words_cache_by_pack(word.pack_id)
+    if "ru_text" in update_data or "uz_text" in update_data:
+        await refresh_glossary()
     return word
 
 
 @router.delete("/words/{word_id}")
 async def delete_word(word_id: int, admin_user: User = Depends(get_admin_user), db: AsyncSession = Depends(get_db)):
     """Delete a word"""
-    result = await db.execute(select(Word).where(Word.id == word_id))
-    word = result.scalar_one_or_none()
-    if not word:
+    # Single round-trip: delete by primary key and get pack_id back for cache invalidation
+    result = await db.execute(delete(Word).where(Word.id == word_id).returning(Word.pack_id))
+    pack_id = result.scalar_one_or_none()
+    if pack_id is None:
         raise HTTPException(status_code=404, detail="Word not found")
 
-    await db.delete(word)
     await db.commit()
-    await invalidate_words_cache_by_pack(word.pack_id)
+    await invalidate_words_cache_by_pack(pack_id)
+    await refresh_glossary()
     return {"message": "Word deleted successfully"}
 
 
@@ -234,7 +242,7 @@ async def get_grammars(pack_id: Optional[int] = Query(None), current_user: User
             updated_at=grammar.updated_at
         ))
     
-    return response_grammars
+    return list_response(GRAMMAR_LIST_ADAPTER, response_grammars)
 
 
 @router.get("/grammars/{grammar_id}", response_model=GrammarSchema)
@@ -402,14 +410,14 @@ async def update_grammar(grammar_id: int, grammar_update: GrammarUpdate, admin_u
 async def delete_grammar(grammar_id: int, admin_user: User = Depends(get_admin_user),
                          db: AsyncSession = Depends(get_db)):
     """Delete a grammar question"""
-    result = await db.execute(select(Grammar).where(Grammar.id == grammar_id))
-    grammar = result.scalar_one_or_none()
-    if not grammar:
+    # Single round-trip: delete by primary key and get pack_id back for cache invalidation
+    result = await db.execute(delete(Grammar).where(Grammar.id == grammar_id).returning(Grammar.pack_id))
+    pack_id = result.scalar_one_or_none()
+    if pack_id is None:
         raise HTTPException(status_code=404, detail="Grammar not found")
 
-    await db.delete(grammar)
     await db.commit()
-    await invalidate_grammars_cache_by_pack(grammar.pack_id)
+    await invalidate_grammars_cache_by_pack(pack_id)
     return {"message": "Grammar deleted successfully"}
 
 
@@ -1,10 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy import select, func, and_, extract
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, insert, func, and_, or_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import re
 import os
+import hashlib
+import asyncio
+import time
 
 from app.database import get_db
 from app.models import User, UserSubscription, BusinessProfile
@@ -14,48 +19,83 @@ from app.schemas import (
     BusinessProfileUpdate
 )
 from app.dependencies import get_admin_user, get_current_user
+from app.versioning import version_compare
+from app.routers.translation import schedule_glossary_reload
 from app.redis_client import (
     get_user_subscription_cache, set_user_subscription_cache, invalidate_user_subscription_cache,
-    get_subscriptions_list_cache, set_subscriptions_list_cache, invalidate_subscriptions_list_cache
+    get_subscriptions_list_cache, set_subscriptions_list_cache, invalidate_subscriptions_list_cache,
+    publish_cache_invalidation, listen_cache_invalidations
 )
 
 router = APIRouter()
 
+VERSION_FORMAT_RE = re.compile(r'^\d+(\.\d+)*$')
 
-def version_compare(version1: str, version2: str) -> int:
-    """
-    Compare two version strings
-    Returns: 1 if version1 > version2, 0 if equal, -1 if version1 < version2
-    """
+# In-process cache of BusinessProfile.required_app_version, cleared via Redis pub/sub
+_required_app_version: Optional[str] = None
+_required_app_version_loaded_at = 0.0
+# Backstop for missed invalidations (no Redis, or messages lost while the listener reconnects)
+REQUIRED_APP_VERSION_TTL_SECONDS = 60
+invalidation_listener: Optional[asyncio.Task] = None
+
+
+def month_range(year: int, month: int) -> Tuple[datetime, datetime]:
+    """Return the half-open [start, next_start) datetime range covering a calendar month"""
+    start = datetime(year, month, 1)
+    next_start = (start + timedelta(days=32)).replace(day=1)
+    return start, next_start
+
+
+async def get_required_app_version(db: AsyncSession) -> str:
+    """Get required app version, cached in-process for up to a minute or until a business profile update is broadcast"""
+    global _required_app_version, _required_app_version_loaded_at
+    if (
+        _required_app_version is None
+        or time.monotonic() - _required_app_version_loaded_at > REQUIRED_APP_VERSION_TTL_SECONDS
+    ):
+        profile = await get_business_profile(db)
+        _required_app_version = profile.required_app_version
+        _required_app_version_loaded_at = time.monotonic()
+    return _required_app_version
 
-    def normalize_version(v):
-        # Remove 'v' prefix if exists and split by dots
-        clean_v = re.sub(r'^v', '', v.lower())
-        parts = clean_v.split('.')
-        # Convert to integers, pad with zeros if needed
-        normalized = []
-        for part in parts:
-            try:
-                normalized.append(int(part))
-            except ValueError:
-                normalized.append(0)
-        return normalized
 
-    v1_parts = normalize_version(version1)
-    v2_parts = normalize_version(version2)
+def clear_in_process_caches():
+    """Drop all in-process caches so the next read goes to the database"""
+    global _required_app_version
+    _required_app_version = None
 
-    # Pad shorter version with zeros
-    max_len = max(len(v1_parts), len(v2_parts))
-    v1_parts.extend([0] * (max_len - len(v1_parts)))
-    v2_parts.extend([0] * (max_len - len(v2_parts)))
 
-    for i in range(max_len):
-        if v1_parts[i] > v2_parts[i]:
-            return 1
-        elif v1_parts[i] < v2_parts[i]:
-            return -1
+def handle_cache_invalidation(event: Dict[str, Any]):
+    """Drop in-process caches named by a cache invalidation event"""
+    if event.get("type") == "business_profile":
+        clear_in_process_caches()
+    elif event.get("type") == "glossary":
+        schedule_glossary_reload()
+
+
+def resync_in_process_caches():
+    """Drop in-process caches and reload the glossary, since events may have been missed while unsubscribed"""
+    clear_in_process_caches()
+    schedule_glossary_reload()
+
+
+def start_cache_invalidation_listener():
+    """Start the background task that applies cache invalidations published by other instances"""
+    global invalidation_listener
+    if invalidation_listener is None:
+        invalidation_listener = asyncio.create_task(
+            listen_cache_invalidations(handle_cache_invalidation, on_subscribe=resync_in_process_caches)
+        )
+        print("Cache invalidation listener started")
+
 
-    return 0
+def stop_cache_invalidation_listener():
+    """Stop the cache invalidation listener"""
+    global invalidation_listener
+    if invalidation_listener is not None:
+        invalidation_listener.cancel()
+        invalidation_listener = None
+        print("Cache invalidation listener stopped")
 
 
 async def get_business_profile(db: AsyncSession) -> BusinessProfile:
@@ -81,11 +121,10 @@ async def get_business_profile(db: AsyncSession) -> BusinessProfile:
 async def check_premium_by_telegram_id(telegram_id: int = Query(...), db: AsyncSession = Depends(get_db)):
     """Check if user has premium subscription by telegram_id (no authentication required)"""
     # Find user by telegram_id
-    user_result = await db.execute(
-        select(User).where(User.telegram_id == telegram_id)
+    user_id = await db.scalar(
+        select(User.id).where(User.telegram_id == telegram_id)
     )
-    user = user_result.scalar_one_or_none()
-    if not user:
+    if user_id is None:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Check for active subscription
@@ -94,12 +133,13 @@ async def check_premium_by_telegram_id(telegram_id: int = Query(...), db: AsyncS
         select(UserSubscription)
         .where(
             and_(
-                UserSubscription.user_id == user.id,
+                UserSubscription.user_id == user_id,
                 UserSubscription.is_active == True,
                 UserSubscription.end_date > now
             )
         )
         .order_by(UserSubscription.end_date.desc())
+        .limit(1)
     )
     active_sub = db_result.scalars().first()
     
@@ -130,20 +170,18 @@ async def check_subscription(
         db: AsyncSession = Depends(get_db)
 ):
     """
-    Check user's premium subscription status with app version logic (cached for 5 minutes)
+    Check user's premium subscription status with app version logic (cached for 1 minute per app version)
     - If app version >= required version: Return mock 24h premium
     - If app version < required version: Check real subscription
     """
     
     # Try cache first
-    cache_key = f"{current_user.id}:{app_version}"
-    cached_data = await get_user_subscription_cache(current_user.id)
-    if cached_data and cached_data.get("app_version") == app_version:
-        return SubscriptionStatus(**cached_data["result"])
+    cached_data = await get_user_subscription_cache(current_user.id, app_version)
+    if cached_data:
+        return SubscriptionStatus(**cached_data)
 
     # Get business profile to check required version
-    profile = await get_business_profile(db)
-    required_version = profile.required_app_version
+    required_version = await get_required_app_version(db)
 
     # Compare app versions
     version_comparison = version_compare(app_version, required_version)
@@ -157,10 +195,7 @@ async def check_subscription(
         )
         
         # Cache the result
-        await set_user_subscription_cache(current_user.id, {
-            "app_version": app_version,
-            "result": result.dict()
-        })
+        await set_user_subscription_cache(current_user.id, app_version, result.dict())
         
         return result
 
@@ -177,6 +212,7 @@ async def check_subscription(
                 )
             )
             .order_by(UserSubscription.end_date.desc())
+            .limit(1)
         )
         active_sub = db_result.scalars().first()
 
@@ -206,10 +242,7 @@ async def check_subscription(
             )
             
         # Cache the result
-        await set_user_subscription_cache(current_user.id, {
-            "app_version": app_version,
-            "result": result.dict()
-        })
+        await set_user_subscription_cache(current_user.id, app_version, result.dict())
         
         return result
 
@@ -222,16 +255,6 @@ async def create_subscription(
 ):
     """Create a new subscription for a user (admin only)"""
 
-    # Validate user exists
-    user_result = await db.execute(select(User).where(User.id == subscription.user_id))
-    target_user = user_result.scalar_one_or_none()
-
-    if not target_user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     # Validate dates
     if subscription.start_date >= subscription.end_date:
         raise HTTPException(
@@ -246,20 +269,29 @@ async def create_subscription(
             detail="Amount must be greater than 0"
         )
 
-    # Create subscription
-    db_subscription = UserSubscription(
-        user_id=subscription.user_id,
-        start_date=subscription.start_date,
-        end_date=subscription.end_date,
-        amount=subscription.amount,
-        currency=subscription.currency,
-        notes=subscription.notes,
-        created_by_admin_id=admin_user.id
-    )
-
-    db.add(db_subscription)
-    await db.commit()
-    await db.refresh(db_subscription)
+    # Create subscription in one round-trip - the user_id foreign key validates the user exists
+    try:
+        insert_result = await db.execute(
+            insert(UserSubscription)
+            .values(
+                user_id=subscription.user_id,
+                start_date=subscription.start_date,
+                end_date=subscription.end_date,
+                amount=subscription.amount,
+                currency=subscription.currency,
+                notes=subscription.notes,
+                created_by_admin_id=admin_user.id
+            )
+            .returning(UserSubscription)
+        )
+        db_subscription = UserSubscriptionSchema.model_validate(insert_result.scalar_one())
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
     
     # Invalidate caches
     await invalidate_user_subscription_cache(subscription.user_id)
@@ -268,25 +300,44 @@ async def create_subscription(
     return db_subscription
 
 
-@router.get("/admin/payment", response_model=List[UserSubscriptionSchema])
+@router.get("/admin/payment", response_model=List[UserSubscriptionSchema], response_class=ORJSONResponse)
 async def get_subscriptions(
         admin_user: User = Depends(get_admin_user),
         db: AsyncSession = Depends(get_db),
         skip: int = Query(0, ge=0),
         limit: int = Query(50, ge=1, le=100),
         user_id: Optional[int] = Query(None),
-        active_only: bool = Query(False)
+        active_only: bool = Query(False),
+        after_created_at: Optional[datetime] = Query(None, description="Keyset cursor: created_at of the last item seen"),
+        after_id: Optional[int] = Query(None, description="Keyset cursor: id of the last item seen")
 ):
-    """Get all subscriptions with optional filters (admin only, cached for 10 minutes)"""
+    """
+    Get all subscriptions with optional filters (admin only, cached for 10 minutes)
+    - Next page: pass the last item's created_at and id as after_created_at/after_id
+    """
     
+    use_cursor = after_created_at is not None and after_id is not None
+
     # Only cache if no filters applied (default query)
-    cache_key = f"skip:{skip}:limit:{limit}:user:{user_id}:active:{active_only}"
-    if not user_id and not active_only and skip == 0 and limit == 50:
+    is_default_query = not user_id and not active_only and not use_cursor and skip == 0 and limit == 50
+    if is_default_query:
         cached_data = await get_subscriptions_list_cache()
         if cached_data:
             return cached_data
 
-    query = select(UserSubscription).order_by(UserSubscription.created_at.desc())
+    query = select(UserSubscription).order_by(UserSubscription.created_at.desc(), UserSubscription.id.desc())
+
+    # Keyset pagination - seek past the cursor instead of scanning OFFSET rows
+    if use_cursor:
+        query = query.where(
+            or_(
+                UserSubscription.created_at < after_created_at,
+                and_(
+                    UserSubscription.created_at == after_created_at,
+                    UserSubscription.id < after_id
+                )
+            )
+        )
 
     # Apply filters
     if user_id:
@@ -301,7 +352,9 @@ async def get_subscriptions(
             )
         )
 
-    query = query.offset(skip).limit(limit)
+    if not use_cursor and skip:
+        query = query.offset(skip)
+    query = query.limit(limit)
 
     result = await db.execute(query)
     subscriptions = result.scalars().all()
@@ -325,7 +378,7 @@ async def get_subscriptions(
     ]
 
     # Cache only default query
-    if not user_id and not active_only and skip == 0 and limit == 50:
+    if is_default_query:
         await set_subscriptions_list_cache(subscriptions_data)
 
     return subscriptions_data
@@ -414,7 +467,7 @@ async def delete_subscription(
     return {"message": "Subscription deleted successfully"}
 
 
-@router.get("/admin/payment/stats", response_model=FinancialStats)
+@router.get("/admin/payment/stats", response_model=FinancialStats, response_class=ORJSONResponse)
 async def get_financial_stats(
         admin_user: User = Depends(get_admin_user),
         db: AsyncSession = Depends(get_db)
@@ -431,15 +484,14 @@ async def get_financial_stats(
     total_revenue = float(total_revenue_result or 0)
 
     # Monthly revenue (current month)
-    current_month = now.month
-    current_year = now.year
+    month_start, next_month_start = month_range(now.year, now.month)
     monthly_revenue_result = await db.scalar(
         select(func.sum(UserSubscription.amount))
         .where(
             and_(
                 UserSubscription.is_active == True,
-                extract('month', UserSubscription.created_at) == current_month,
-                extract('year', UserSubscription.created_at) == current_year
+                UserSubscription.created_at >= month_start,
+                UserSubscription.created_at < next_month_start
             )
         )
     )
@@ -451,7 +503,8 @@ async def get_financial_stats(
         .where(
             and_(
                 UserSubscription.is_active == True,
-                extract('year', UserSubscription.created_at) == current_year
+                UserSubscription.created_at >= datetime(now.year, 1, 1),
+                UserSubscription.created_at < datetime(now.year + 1, 1, 1)
             )
         )
     )
@@ -481,18 +534,19 @@ async def get_financial_stats(
 
     # Revenue by month (last 12 months)
     revenue_by_month = []
-    for i in range(12):
+    for i in range(11, -1, -1):  # Oldest month first, so entries are appended in chronological order
         target_date = now - timedelta(days=30 * i)
         target_month = target_date.month
         target_year = target_date.year
+        target_start, target_end = month_range(target_year, target_month)
 
         month_revenue_result = await db.scalar(
             select(func.sum(UserSubscription.amount))
             .where(
                 and_(
                     UserSubscription.is_active == True,
-                    extract('month', UserSubscription.created_at) == target_month,
-                    extract('year', UserSubscription.created_at) == target_year
+                    UserSubscription.created_at >= target_start,
+                    UserSubscription.created_at < target_end
                 )
             )
         )
@@ -502,13 +556,13 @@ async def get_financial_stats(
             .where(
                 and_(
                     UserSubscription.is_active == True,
-                    extract('month', UserSubscription.created_at) == target_month,
-                    extract('year', UserSubscription.created_at) == target_year
+                    UserSubscription.created_at >= target_start,
+                    UserSubscription.created_at < target_end
                 )
             )
         )
 
-        revenue_by_month.insert(0, {
+        revenue_by_month.append({
             "month": f"{target_year}-{target_month:02d}",
             "revenue": float(month_revenue_result or 0),
             "count": int(month_count_result or 0)
@@ -527,11 +581,21 @@ async def get_financial_stats(
 
 @router.get("/admin/business", response_model=BusinessProfileSchema)
 async def get_business_profile_endpoint(
+        request: Request,
+        response: Response,
         admin_user: User = Depends(get_admin_user),
         db: AsyncSession = Depends(get_db)
 ):
-    """Get business profile (admin only)"""
+    """Get business profile (admin only, supports If-None-Match/ETag)"""
     profile = await get_business_profile(db)
+
+    # ETag changes whenever the profile row is updated
+    version_marker = profile.updated_at or profile.created_at
+    etag = f'"{hashlib.md5(f"{profile.id}:{version_marker}".encode()).hexdigest()}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
     return profile
 
 
@@ -549,7 +613,7 @@ async def update_business_profile(
     # Validate version format if provided
     if "required_app_version" in update_data:
         version = update_data["required_app_version"]
-        if not re.match(r'^\d+(\.\d+)*$', version):
+        if not VERSION_FORMAT_RE.match(version):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid version format. Use format like '1.0.0'"
@@ -562,4 +626,8 @@ async def update_business_profile(
     await db.commit()
     await db.refresh(profile)
 
-    return profile
\ No newline at end of file
+    # Drop the cached required version here and on every other instance
+    handle_cache_invalidation({"type": "business_profile"})
+    await publish_cache_invalidation({"type": "business_profile"})
+
+    return profile
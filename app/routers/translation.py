@@ -1,14 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from openai import AsyncOpenAI
 import os
+import httpx
+import hashlib
+import functools
+import json
+import asyncio
+import orjson
+from types import MappingProxyType
+from typing import Dict, List, Optional, Set, Tuple
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from aiolimiter import AsyncLimiter
 from dotenv import load_dotenv
 
-from app.database import get_db
-from app.models import Translation, User
-from app.schemas import TranslationRequest, TranslationResponse
-from app.dependencies import get_current_user
+from app.database import get_db, AsyncSessionLocal
+from app.models import Translation, TranslationBatch, User, Word
+from app.schemas import TranslationRequest, TranslationResponse, TranslationBatch as TranslationBatchSchema
+from app.dependencies import get_current_user, get_admin_user
+from app.redis_client import get_translation_cache, set_translation_cache, increment_rate_limit, publish_cache_invalidation
 
 load_dotenv()
 
@@ -19,43 +33,105 @@ openai_api_key = os.getenv("OPENAI_API_KEY")
 if not openai_api_key:
     raise ValueError("OPENAI_API_KEY environment variable is not set")
 
+# Shared HTTP/2 connection pool so bursts of translations reuse warm connections
+openai_http_client = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+    timeout=httpx.Timeout(30.0, connect=5.0)
+)
+
 client = AsyncOpenAI(
-    api_key=openai_api_key
+    api_key=openai_api_key,
+    http_client=openai_http_client
 )
 
-ALLOWED_LANGUAGES = {"uz", "ru"}
-LANGUAGE_NAMES = {
+# In-flight OpenAI translations keyed by (text, target_language)
+_inflight_translations: Dict[Tuple[str, str], asyncio.Future] = {}
+
+# Global OpenAI request budget (per process) and per-user budget for uncached translations
+openai_limiter = AsyncLimiter(max_rate=500, time_period=60)
+USER_TRANSLATION_LIMIT = 30
+USER_TRANSLATION_WINDOW_SECONDS = 60
+
+# Background scheduler polling OpenAI batch jobs
+batch_scheduler: Optional[AsyncIOScheduler] = None
+BATCH_FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+BATCH_IMPORT_CHUNK_SIZE = 1000
+
+TRANSLATION_MODEL = "gpt-4o-mini"
+ALLOWED_LANGUAGES = frozenset({"uz", "ru"})
+LANGUAGE_NAMES = MappingProxyType({
     "uz": "Uzbek",
     "ru": "Russian"
-}
+})
 
 
-async def translate_with_openai(text: str, target_language: str) -> str:
-    """Translate text using OpenAI API"""
+# System prompts are built once per language at import instead of formatted on every call
+SYSTEM_PROMPTS = {
+    lang: f"""You are a professional translator. Translate the given text to {name}. 
 
-    target_name = LANGUAGE_NAMES[target_language]
+Rules:
+- Only translate to {name}
+- Preserve the meaning and context
+- Keep the same tone and style
+- For technical terms, use appropriate {name} equivalents
+- Respond with a JSON object {{"translation": "..."}} and no explanations"""
+    for lang, name in LANGUAGE_NAMES.items()
+}
 
-    system_prompt = f"""You are a professional translator. Translate the given text to {target_name}. 
+BATCH_SYSTEM_PROMPTS = {
+    lang: f"""You are a professional translator. Translate each of the given texts to {name}.
 
 Rules:
-- Only translate to {target_name}
+- Only translate to {name}
 - Preserve the meaning and context
 - Keep the same tone and style
-- For technical terms, use appropriate {target_name} equivalents
-- Return only the translation, no explanations"""
+- For technical terms, use appropriate {name} equivalents
+- The input is a JSON object {{"texts": [...]}}
+- Respond with a JSON object {{"translations": [...]}} containing exactly one translation per text, in the same order"""
+    for lang, name in LANGUAGE_NAMES.items()
+}
+
+
+# Request pieces bound once at import - only the user text and token budget vary per call
+SYSTEM_MESSAGES = MappingProxyType({
+    lang: {"role": "system", "content": prompt} for lang, prompt in SYSTEM_PROMPTS.items()
+})
+
+create_translation_completion = functools.partial(
+    client.chat.completions.create,
+    model=TRANSLATION_MODEL,
+    response_format={"type": "json_object"},
+    temperature=0.3
+)
+
+
+def estimate_max_tokens(text: str) -> int:
+    """Output token budget for translating text - roughly 1.8x the input tokens (about 2 chars per token)"""
+    return min(1000, max(32, int((len(text) // 2 + 1) * 1.8) + 16))
+
+
+def translation_input_hash(text: str) -> bytes:
+    """16-byte lookup key for a translation input, matching the translations.input_hash column"""
+    return hashlib.md5(text.encode()).digest()
+
+
+def parse_translation(content: str) -> str:
+    """Extract the translation from a {"translation": "..."} model reply"""
+    return json.loads(content)["translation"].strip()
+
+
+async def translate_with_openai(text: str, target_language: str) -> str:
+    """Translate text using OpenAI API"""
 
     try:
-        response = await client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": text}
-            ],
-            max_tokens=1000,
-            temperature=0.3
-        )
+        async with openai_limiter:
+            response = await create_translation_completion(
+                messages=[SYSTEM_MESSAGES[target_language], {"role": "user", "content": text}],
+                max_tokens=estimate_max_tokens(text)
+            )
 
-        return response.choices[0].message.content.strip()
+        return parse_translation(response.choices[0].message.content)
 
     except Exception as e:
         raise HTTPException(
@@ -64,6 +140,167 @@ Rules:
         )
 
 
+async def translate_batch_with_openai(texts: List[str], target_language: str) -> List[str]:
+    """Translate several texts in one OpenAI call, falling back to one call per text on a malformed reply"""
+
+    try:
+        async with openai_limiter:
+            response = await create_translation_completion(
+                messages=[
+                    {"role": "system", "content": BATCH_SYSTEM_PROMPTS[target_language]},
+                    {"role": "user", "content": json.dumps({"texts": texts}, ensure_ascii=False)}
+                ],
+                max_tokens=min(sum(estimate_max_tokens(text) for text in texts) + 16, 4096)
+            )
+        translations = json.loads(response.choices[0].message.content)["translations"]
+        if len(translations) == len(texts) and all(isinstance(t, str) for t in translations):
+            return [t.strip() for t in translations]
+        print(f"Batch translation returned {len(translations)} items for {len(texts)} texts, retrying individually")
+    except Exception as e:
+        print(f"Batch translation failed, retrying individually: {e}")
+
+    return list(await asyncio.gather(*(translate_with_openai(text, target_language) for text in texts)))
+
+
+class BatchTranslator:
+    """Collects translation requests for a short window and sends them to OpenAI in one call per language"""
+
+    def __init__(self, max_batch: int = 16, max_wait: float = 0.08):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._pending: Dict[str, List[Tuple[str, asyncio.Future]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, text: str, target_language: str) -> str:
+        """Queue text for translation and wait for its batch to complete"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(target_language, [])
+        pending.append((text, future))
+
+        if len(pending) >= self.max_batch:
+            self._flush(target_language)
+        elif len(pending) == 1:
+            self._timers[target_language] = loop.call_later(self.max_wait, self._flush, target_language)
+
+        return await future
+
+    def _flush(self, target_language: str):
+        timer = self._timers.pop(target_language, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(target_language, [])
+        if batch:
+            task = asyncio.create_task(self._run(target_language, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, target_language: str, batch: List[Tuple[str, asyncio.Future]]):
+        texts = [text for text, _ in batch]
+        try:
+            if len(texts) == 1:
+                outputs = [await translate_with_openai(texts[0], target_language)]
+            else:
+                outputs = await translate_batch_with_openai(texts, target_language)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), output_text in zip(batch, outputs):
+            if not future.done():
+                future.set_result(output_text)
+
+
+batch_translator = BatchTranslator()
+
+
+async def translate_single_flight(text: str, target_language: str) -> str:
+    """Translate text, sharing one OpenAI call between concurrent identical requests"""
+    key = (text, target_language)
+    while (inflight := _inflight_translations.get(key)) is not None:
+        try:
+            # Shield so a cancelled waiter doesn't cancel the shared call
+            return await asyncio.shield(inflight)
+        except asyncio.CancelledError:
+            if not inflight.cancelled():
+                raise  # This request itself was cancelled
+            # The leading request was cancelled - retry, becoming the leader if nobody else has
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight_translations[key] = future
+    try:
+        output_text = await batch_translator.submit(text, target_language)
+        future.set_result(output_text)
+        return output_text
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # Mark retrieved so an unawaited future doesn't log a warning
+        raise
+    finally:
+        _inflight_translations.pop(key, None)
+
+
+# GLOSSARY OF COURSE VOCABULARY
+# Maps normalized source text to its translation per target language, built from Word rows.
+# Only unambiguous pairs are kept: a key with several translations, a single letter, or an
+# annotated entry like "na (qattiq)" is left to the model, which sees the surrounding text.
+GLOSSARY: Dict[str, Dict[str, str]] = {lang: {} for lang in ALLOWED_LANGUAGES}
+_glossary_reloads: Set[asyncio.Task] = set()
+
+
+def glossary_key(text: str) -> str:
+    return text.strip().casefold()
+
+
+def is_glossary_text(text: Optional[str]) -> bool:
+    return bool(text) and len(text.strip()) > 1 and "(" not in text
+
+
+def build_glossary(pairs) -> Dict[str, Dict[str, str]]:
+    """Build per-language lookups from (ru_text, uz_text) pairs, dropping ambiguous keys"""
+    candidates: Dict[str, Dict[str, Set[str]]] = {lang: {} for lang in ALLOWED_LANGUAGES}
+    for ru_text, uz_text in pairs:
+        if is_glossary_text(ru_text) and is_glossary_text(uz_text):
+            candidates["uz"].setdefault(glossary_key(ru_text), set()).add(uz_text.strip())
+            candidates["ru"].setdefault(glossary_key(uz_text), set()).add(ru_text.strip())
+    return {
+        lang: {key: next(iter(values)) for key, values in entries.items() if len(values) == 1}
+        for lang, entries in candidates.items()
+    }
+
+
+async def load_glossary():
+    """Load all word pairs into the in-memory glossary"""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(Word.ru_text, Word.uz_text))
+        glossary = build_glossary(result.all())
+    for lang in GLOSSARY:
+        GLOSSARY[lang] = glossary[lang]
+    return len(GLOSSARY["uz"])
+
+
+def schedule_glossary_reload():
+    """Reload the glossary in the background after words changed in another instance"""
+    task = asyncio.create_task(load_glossary())
+    _glossary_reloads.add(task)
+    task.add_done_callback(_glossary_reloads.discard)
+
+
+async def refresh_glossary():
+    """Reload this instance's glossary after a committed word change and notify the others"""
+    try:
+        await load_glossary()
+    except Exception as e:
+        print(f"Glossary reload error: {e}")
+    await publish_cache_invalidation({"type": "glossary"})
+
+
 @router.post("/translate", response_model=TranslationResponse)
 async def translate_text(
         request: TranslationRequest,
@@ -86,40 +323,71 @@ async def translate_text(
             detail="Input text cannot be empty"
         )
 
-    # Check if translation exists in database (cache)
-    existing_result = await db.execute(
-        select(Translation).where(
-            Translation.input_text == request.text.strip(),
-            Translation.target_language == request.target_language
+    input_text = request.text.strip()
+
+    # Known vocabulary is answered from the in-memory glossary, then Redis
+    cached_output = GLOSSARY[request.target_language].get(glossary_key(input_text))
+    if cached_output is None:
+        cached_output = await get_translation_cache(input_text, request.target_language)
+    if cached_output is None:
+        # Check if translation exists in database (cache) - only the output column is needed
+        cached_output = await db.scalar(
+            select(Translation.output_text).where(
+                Translation.input_hash == translation_input_hash(input_text),
+                Translation.target_language == request.target_language
+            )
         )
-    )
-    existing_translation = existing_result.scalar_one_or_none()
+        if cached_output is not None:
+            await set_translation_cache(input_text, request.target_language, cached_output)
 
-    if existing_translation:
-        # Return cached translation
-        return TranslationResponse(
-            input_text=existing_translation.input_text,
-            target_language=existing_translation.target_language,
-            output_text=existing_translation.output_text,
-            from_cache=True
+    if cached_output is not None:
+        # Cache hits are built server-side, so skip response model validation
+        return ORJSONResponse({
+            "input_text": input_text,
+            "target_language": request.target_language,
+            "output_text": cached_output,
+            "from_cache": True
+        })
+
+    # Translation not cached - enforce per-user budget before spending OpenAI tokens
+    request_count = await increment_rate_limit(
+        f"translate:user:{current_user.id}", USER_TRANSLATION_WINDOW_SECONDS
+    )
+    if request_count > USER_TRANSLATION_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many translation requests. Please try again in a minute."
         )
 
-    # Translation not cached - call OpenAI
+    # Call OpenAI
     try:
-        output_text = await translate_with_openai(request.text.strip(), request.target_language)
+        output_text = await translate_single_flight(input_text, request.target_language)
 
-        # Save to database for future caching
-        new_translation = Translation(
-            input_text=request.text.strip(),
-            target_language=request.target_language,
-            output_text=output_text
+        # Save to database for future caching - a concurrent identical request may have saved it first
+        insert_result = await db.execute(
+            insert(Translation)
+            .values(
+                input_text=input_text,
+                target_language=request.target_language,
+                output_text=output_text
+            )
+            .on_conflict_do_nothing(constraint="unique_translation")
+            .returning(Translation.output_text)
         )
-
-        db.add(new_translation)
+        saved_output = insert_result.scalar_one_or_none()
+        if saved_output is None:
+            # Keep responses consistent with the row that won the race
+            output_text = await db.scalar(
+                select(Translation.output_text).where(
+                    Translation.input_hash == translation_input_hash(input_text),
+                    Translation.target_language == request.target_language
+                )
+            )
         await db.commit()
+        await set_translation_cache(input_text, request.target_language, output_text)
 
         return TranslationResponse(
-            input_text=request.text.strip(),
+            input_text=input_text,
             target_language=request.target_language,
             output_text=output_text,
             from_cache=False
@@ -132,4 +400,219 @@ async def translate_text(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Translation service error: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+# BULK TRANSLATION VIA OPENAI BATCH API
+async def submit_translation_batch(requests: List[Tuple[str, str]]) -> Tuple[str, str]:
+    """Upload (text, target_language) pairs as a JSONL batch job, return (batch_id, input_file_id)"""
+    lines = []
+    for index, (text, target_language) in enumerate(requests):
+        lines.append(json.dumps({
+            "custom_id": f"{target_language}-{index}",
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": TRANSLATION_MODEL,
+                "messages": [
+                    {"role": "system", "content": SYSTEM_PROMPTS[target_language]},
+                    {"role": "user", "content": text}
+                ],
+                "response_format": {"type": "json_object"},
+                "max_tokens": estimate_max_tokens(text),
+                "temperature": 0.3
+            }
+        }, ensure_ascii=False))
+
+    input_file = await client.files.create(
+        file=("translations.jsonl", "\n".join(lines).encode()),
+        purpose="batch"
+    )
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    return batch.id, input_file.id
+
+
+async def import_translation_batch(db: AsyncSession, translation_batch: TranslationBatch, output_file_id: str) -> int:
+    """Save a completed batch's translations to the database, return number of rows read from the output"""
+    # Recover each request's text and language from the uploaded input file
+    input_content = await client.files.content(translation_batch.input_file_id)
+    inputs = {}
+    for line in input_content.text.splitlines():
+        if line.strip():
+            item = json.loads(line)
+            target_language = item["custom_id"].split("-", 1)[0]
+            inputs[item["custom_id"]] = (item["body"]["messages"][-1]["content"], target_language)
+
+    output_content = await client.files.content(output_file_id)
+    rows = []
+    for line in output_content.text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code") != 200 or item["custom_id"] not in inputs:
+            continue
+        try:
+            output_text = parse_translation(response["body"]["choices"][0]["message"]["content"])
+        except (ValueError, KeyError, TypeError):
+            continue
+        input_text, target_language = inputs[item["custom_id"]]
+        rows.append({
+            "input_text": input_text,
+            "target_language": target_language,
+            "output_text": output_text
+        })
+
+    # executemany in chunks - a single multi-VALUES insert overflows asyncpg's 32767 bind parameter limit
+    insert_stmt = insert(Translation).on_conflict_do_nothing(constraint="unique_translation")
+    for start in range(0, len(rows), BATCH_IMPORT_CHUNK_SIZE):
+        await db.execute(insert_stmt, rows[start:start + BATCH_IMPORT_CHUNK_SIZE])
+    return len(rows)
+
+
+async def sync_translation_batches():
+    """Background task: poll pending batch jobs and import finished results"""
+    async with AsyncSessionLocal() as db:
+        try:
+            result = await db.execute(
+                select(TranslationBatch).where(TranslationBatch.status.notin_(BATCH_FINAL_STATUSES))
+            )
+            for translation_batch in result.scalars().all():
+                batch = await client.batches.retrieve(translation_batch.openai_batch_id)
+                if batch.status == "completed" and batch.output_file_id:
+                    translation_batch.imported_count = await import_translation_batch(
+                        db, translation_batch, batch.output_file_id
+                    )
+                translation_batch.status = batch.status
+                await db.commit()
+        except Exception as e:
+            await db.rollback()
+            print(f"Error syncing translation batches: {e}")
+
+
+def start_translation_batch_scheduler():
+    """Start the background scheduler that polls OpenAI batch jobs"""
+    global batch_scheduler
+    if batch_scheduler is None:
+        batch_scheduler = AsyncIOScheduler()
+        batch_scheduler.add_job(
+            sync_translation_batches,
+            trigger=IntervalTrigger(minutes=5),
+            id='translation_batch_sync',
+            name='Sync Translation Batches',
+            replace_existing=True
+        )
+        batch_scheduler.start()
+        print("Translation batch scheduler started")
+
+
+def stop_translation_batch_scheduler():
+    """Stop the translation batch scheduler"""
+    global batch_scheduler
+    if batch_scheduler is not None:
+        batch_scheduler.shutdown()
+        batch_scheduler = None
+        print("Translation batch scheduler stopped")
+
+
+@router.post("/admin/batch", response_model=TranslationBatchSchema, status_code=status.HTTP_202_ACCEPTED)
+async def create_translation_batch(
+        requests: List[TranslationRequest],
+        admin_user: User = Depends(get_admin_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Pre-translate many texts through the OpenAI Batch API (admin only, results imported within 24h)"""
+
+    # Validate, normalize and de-duplicate input
+    pending = set()
+    for request in requests:
+        if request.target_language not in ALLOWED_LANGUAGES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid target language. Only {', '.join(ALLOWED_LANGUAGES)} are supported."
+            )
+        if request.text.strip():
+            pending.add((request.text.strip(), request.target_language))
+
+    # Skip texts that are already translated
+    if pending:
+        existing_result = await db.execute(
+            select(Translation.input_text, Translation.target_language).where(
+                Translation.input_hash.in_({translation_input_hash(text) for text, _ in pending})
+            )
+        )
+        pending -= {tuple(row) for row in existing_result.all()}
+
+    if not pending:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="All texts are already translated"
+        )
+
+    try:
+        batch_id, input_file_id = await submit_translation_batch(sorted(pending))
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Batch submission failed: {str(e)}"
+        )
+
+    translation_batch = TranslationBatch(
+        openai_batch_id=batch_id,
+        input_file_id=input_file_id,
+        status="validating",
+        request_count=len(pending)
+    )
+    db.add(translation_batch)
+    await db.commit()
+    await db.refresh(translation_batch)
+    return translation_batch
+
+
+@router.get("/admin/batch/{batch_id}", response_model=TranslationBatchSchema)
+async def get_translation_batch(
+        batch_id: int,
+        admin_user: User = Depends(get_admin_user),
+        db: AsyncSession = Depends(get_db)
+):
+    """Get status of a bulk translation batch (admin only)"""
+    translation_batch = await db.get(TranslationBatch, batch_id)
+    if not translation_batch:
+        raise HTTPException(status_code=404, detail="Translation batch not found")
+    return translation_batch
+
+
+@router.get("/admin/translations")
+async def get_all_translations(
+        after_id: Optional[int] = None,
+        limit: int = Query(100, ge=1, le=1000),
+        admin_user: User = Depends(get_admin_user)
+):
+    """Stream cached translations as NDJSON, keyset-paginated by id (admin only)"""
+    stmt = select(Translation).order_by(Translation.id).limit(limit)
+    if after_id is not None:
+        stmt = stmt.where(Translation.id > after_id)
+
+    async def rows():
+        # Own session: the stream outlives the request handler
+        async with AsyncSessionLocal() as session:
+            result = await session.stream_scalars(stmt)
+            async for translation in result:
+                yield orjson.dumps({
+                    "id": translation.id,
+                    "input_text": translation.input_text,
+                    "target_language": translation.target_language,
+                    "output_text": translation.output_text,
+                    "created_at": translation.created_at
+                }) + b"\n"
+
+    return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+
+async def close_openai_client():
+    """Close the shared OpenAI HTTP connection pool"""
+    await openai_http_client.aclose()
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
 from typing import Optional, List
 from datetime import datetime
 from enum import Enum
@@ -27,8 +27,7 @@ class User(UserBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AuthRequest(BaseModel):
@@ -82,8 +81,7 @@ class Pack(PackBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class LessonBase(BaseModel):
@@ -109,8 +107,7 @@ class Lesson(LessonBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ModuleBase(BaseModel):
@@ -133,8 +130,7 @@ class Module(ModuleBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class LessonsResponse(BaseModel):
@@ -163,8 +159,7 @@ class Word(WordBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class GrammarBase(BaseModel):
@@ -193,8 +188,7 @@ class Grammar(GrammarBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PackWithQuizData(PackBase):
@@ -205,8 +199,7 @@ class PackWithQuizData(PackBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class QuizResponse(BaseModel):
@@ -234,8 +227,7 @@ class GrammarTopic(GrammarTopicBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class GrammarTopicSimple(BaseModel):
@@ -246,8 +238,7 @@ class GrammarTopicSimple(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class GrammarTopicsResponse(BaseModel):
@@ -310,6 +301,18 @@ class TranslationResponse(BaseModel):
     from_cache: bool
 
 
+class TranslationBatch(BaseModel):
+    id: int
+    openai_batch_id: str
+    status: str
+    request_count: int
+    imported_count: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 # Student Progress Enhanced Schemas
 class LessonWithProgress(BaseModel):
     id: int
@@ -323,8 +326,7 @@ class LessonWithProgress(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ModuleWithProgress(BaseModel):
@@ -338,8 +340,7 @@ class ModuleWithProgress(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class StudentContentResponse(BaseModel):
@@ -366,8 +367,7 @@ class PackWithProgress(BaseModel):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class LessonPacksResponse(BaseModel):
@@ -386,8 +386,7 @@ class WordSimple(BaseModel):
     uz_text: Optional[str] = None
     audio_url: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PackWordsUserProgress(BaseModel):
@@ -416,17 +415,15 @@ class GrammarQuestion(BaseModel):
     correct_option: Optional[int] = None
     sentence: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
-class GrammarTopicSimple(BaseModel):
+class GrammarTopicMinimal(BaseModel):
     id: int
     video_url: Optional[str] = None
     markdown_text: Optional[str] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class PackGrammarUserProgress(BaseModel):
@@ -442,7 +439,7 @@ class PackGrammarResponse(BaseModel):
     pack_type: str
     lesson_title: str
     grammar_questions: List[GrammarQuestion]
-    grammar_topics: List[GrammarTopicSimple]
+    grammar_topics: List[GrammarTopicMinimal]
     total_questions: int
     total_topics: int
     user_progress: PackGrammarUserProgress
@@ -478,8 +475,7 @@ class UserSubscription(UserSubscriptionBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class SubscriptionStatus(BaseModel):
@@ -527,8 +523,7 @@ class BusinessProfile(BusinessProfileBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Quiz Result Schemas
@@ -593,4 +588,12 @@ class LeaderboardPositionDashboard(BaseModel):
 class DashboardHomeResponse(BaseModel):
     user_info: UserInfoDashboard
     current_lesson: Optional[CurrentLessonDashboard] = None
-    leaderboard_position: LeaderboardPositionDashboard
\ No newline at end of file
+    leaderboard_position: LeaderboardPositionDashboard
+
+
+# Prebuilt adapters for list responses - built once at import instead of per request
+MODULE_LIST_ADAPTER = TypeAdapter(List[Module])
+LESSON_LIST_ADAPTER = TypeAdapter(List[Lesson])
+PACK_LIST_ADAPTER = TypeAdapter(List[Pack])
+WORD_LIST_ADAPTER = TypeAdapter(List[Word])
+GRAMMAR_LIST_ADAPTER = TypeAdapter(List[Grammar])
@@ -1,9 +1,11 @@
 import os
 import asyncio
 from datetime import datetime, timedelta
-from telegram import Update, KeyboardButton, ReplyKeyboardMarkup
+from typing import Optional
+from telegram import Bot, Update, KeyboardButton, ReplyKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-from sqlalchemy import select
+from sqlalchemy import select, update as sql_update  # `update` is the Telegram Update in handlers
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import AsyncSessionLocal
 from app.models import User
@@ -14,6 +16,37 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 
+# Webhook mode: Telegram pushes updates to {PUBLIC_URL}/api/telegram/webhook instead of being polled
+USE_WEBHOOK = os.getenv("USE_WEBHOOK", "false").lower() == "true"
+PUBLIC_URL = os.getenv("PUBLIC_URL", "").rstrip("/")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+
+application: Optional[Application] = None
+
+# Shared bot for outgoing messages - keeps one initialized HTTP connection pool per process
+_bot: Optional[Bot] = None
+_bot_lock = asyncio.Lock()  # Concurrent first callers would otherwise each build and leak a Bot
+
+
+async def get_bot() -> Bot:
+    """Return the process-wide initialized Bot, creating it on first use"""
+    global _bot
+    if _bot is None:
+        async with _bot_lock:
+            if _bot is None:
+                bot = Bot(token=BOT_TOKEN)
+                await bot.initialize()
+                _bot = bot
+    return _bot
+
+
+async def close_bot():
+    """Shut down the shared Bot's HTTP connections"""
+    global _bot
+    if _bot is not None:
+        bot, _bot = _bot, None
+        await bot.shutdown()
+
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     keyboard = [[KeyboardButton("📱 Telefon raqamni ulashish", request_contact=True)]]
@@ -26,6 +59,18 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
+async def fetch_avatar_url(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Resolve the user's latest Telegram profile photo to a file URL, or None"""
+    try:
+        photos = await update.effective_user.get_profile_photos()
+        if photos.photos:
+            file = await context.bot.get_file(photos.photos[0][-1].file_id)
+            return file.file_path
+    except Exception:
+        pass
+    return None
+
+
 async def handle_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
     contact = update.message.contact
     
@@ -43,31 +88,39 @@ async def handle_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     temp_code = generate_temp_code()
     
+    # Fetch the avatar from Telegram while the user is registered; only new users need it
+    avatar_task = asyncio.create_task(fetch_avatar_url(update, context))
+    
     async with AsyncSessionLocal() as session:
-        existing_user = await session.execute(
-            select(User).where(User.telegram_id == telegram_id)
-        )
-        user = existing_user.scalar_one_or_none()
-        
-        if not user:
-            avatar_url = None
-            try:
-                photos = await update.effective_user.get_profile_photos()
-                if photos.photos:
-                    file = await context.bot.get_file(photos.photos[0][-1].file_id)
-                    avatar_url = file.file_path
-            except Exception:
-                avatar_url = None
-            
-            user = User(
-                telegram_id=telegram_id,
-                phone_number=phone_number,
-                first_name=first_name or "Foydalanuvchi",
-                last_name=last_name,
-                avatar_url=avatar_url
+        try:
+            # Single round-trip registration, safe against duplicate taps of the share button
+            result = await session.execute(
+                insert(User)
+                .values(
+                    telegram_id=telegram_id,
+                    phone_number=phone_number,
+                    first_name=first_name or "Foydalanuvchi",
+                    last_name=last_name
+                )
+                .on_conflict_do_nothing(index_elements=[User.telegram_id])
+                .returning(User.id)
             )
-            session.add(user)
+            new_user_id = result.scalar_one_or_none()
             await session.commit()
+            
+            if new_user_id is None:
+                avatar_task.cancel()
+            else:
+                # Awaited after the commit so the Telegram round-trips never hold the row lock
+                avatar_url = await avatar_task
+                if avatar_url:
+                    await session.execute(
+                        sql_update(User).where(User.id == new_user_id).values(avatar_url=avatar_url)
+                    )
+                    await session.commit()
+        except Exception:
+            avatar_task.cancel()
+            raise
     
     from app.redis_client import set_otp_code
     await set_otp_code(phone_number, temp_code, 300)
@@ -80,25 +133,24 @@ async def handle_contact(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 
-async def send_code_to_user(phone_number: str, code: str):
-    """Send verification code to user via Telegram"""
+async def send_code_to_user(phone_number: str, code: str, telegram_id: Optional[int] = None):
+    """Send verification code to user via Telegram (pass telegram_id when the caller already has it)"""
     try:
-        async with AsyncSessionLocal() as session:
-            user_result = await session.execute(
-                select(User).where(User.phone_number == phone_number)
-            )
-            user = user_result.scalar_one_or_none()
-            
-            if user:
-                from telegram import Bot
-                bot = Bot(token=BOT_TOKEN)
-                await bot.send_message(
-                    chat_id=user.telegram_id,
-                    text=f"🔐 Tasdiqlash kodi: {code}\n\n"
-                         f"Ushbu kod 5 daqiqa davomida amal qiladi. "
-                         f"Kodni ilovada kiriting."
+        if telegram_id is None:
+            async with AsyncSessionLocal() as session:
+                telegram_id = await session.scalar(
+                    select(User.telegram_id).where(User.phone_number == phone_number)
                 )
-                return True
+        
+        if telegram_id is not None:
+            bot = await get_bot()
+            await bot.send_message(
+                chat_id=telegram_id,
+                text=f"🔐 Tasdiqlash kodi: {code}\n\n"
+                     f"Ushbu kod 5 daqiqa davomida amal qiladi. "
+                     f"Kodni ilovada kiriting."
+            )
+            return True
     except Exception as e:
         print(f"Error sending code to user: {e}")
     return False
@@ -107,17 +159,41 @@ async def send_code_to_user(phone_number: str, code: str):
 
 
 async def start_bot():
+    global application
     if not BOT_TOKEN:
         print("BOT_TOKEN not found in environment variables")
         return
     
-    application = Application.builder().token(BOT_TOKEN).build()
+    if USE_WEBHOOK and not WEBHOOK_SECRET:
+        # Without the secret anyone could post forged updates and receive other users' login codes
+        raise ValueError("WEBHOOK_SECRET must be set when USE_WEBHOOK is enabled")
+    
+    builder = Application.builder().token(BOT_TOKEN)
+    if USE_WEBHOOK:
+        builder = builder.updater(None)  # Updates arrive through the FastAPI webhook route
+    bot_application = builder.build()
     
-    application.add_handler(CommandHandler("start", start_command))
-    application.add_handler(MessageHandler(filters.CONTACT, handle_contact))
+    bot_application.add_handler(CommandHandler("start", start_command))
+    bot_application.add_handler(MessageHandler(filters.CONTACT, handle_contact))
     
-    await application.initialize()
-    await application.start()
-    await application.updater.start_polling()
+    await bot_application.initialize()
+    await bot_application.start()
+    if USE_WEBHOOK:
+        await bot_application.bot.set_webhook(
+            url=f"{PUBLIC_URL}/api/telegram/webhook",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=Update.ALL_TYPES
+        )
+    else:
+        await bot_application.updater.start_polling()
+    application = bot_application
     
-    print("Telegram bot started successfully!")
\ No newline at end of file
+    print(f"Telegram bot started successfully ({'webhook' if USE_WEBHOOK else 'polling'})!")
+
+
+async def process_webhook_update(data: dict) -> bool:
+    """Queue an update received on the webhook for the bot's handlers"""
+    if application is None:
+        return False
+    await application.update_queue.put(Update.de_json(data, application.bot))
+    return True
\ No newline at end of file
@@ -1,11 +1,17 @@
 import re
 import os
-import random
-import string
+import secrets
+import time
+import hashlib
+import threading
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
+from typing import Optional, Any
+from cachetools import TLRUCache
+import jwt
+from jwt.exceptions import PyJWTError
 from fastapi import HTTPException, status
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,19 +21,29 @@ JWT_ACCESS_TOKEN_EXPIRE_DAYS = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_DAYS", 7))
 JWT_REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("JWT_REFRESH_TOKEN_EXPIRE_DAYS", 30))
 ALGORITHM = "HS256"
 
+NAME_CLEAN_RE = re.compile(r'[^a-zA-Zа-яА-Я\s]')
+
+# Decoded token payloads keyed by token hash; each entry lives at most 30s and never past the token's exp
+TOKEN_CACHE_TTL_SECONDS = 30
+_token_cache = TLRUCache(
+    maxsize=10000,
+    ttu=lambda key, payload, now: min(now + TOKEN_CACHE_TTL_SECONDS, payload["exp"]),
+    timer=time.time
+)
+_token_cache_lock = threading.Lock()
+
 
 def sanitize_name(name: str) -> str:
     if not name:
         return ""
     
-    cleaned = re.sub(r'[^a-zA-Zа-яА-Я\s]', '', name)
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    cleaned = ' '.join(NAME_CLEAN_RE.sub('', name).split())
     
     return cleaned[:50] if cleaned else ""
 
 
 def generate_temp_code() -> str:
-    return ''.join(random.choices(string.digits, k=4))
+    return f"{secrets.randbelow(10000):04d}"
 
 
 def create_access_token(data: dict) -> str:
@@ -45,16 +61,30 @@ def create_refresh_token(data: dict) -> str:
 
 
 def verify_token(token: str, token_type: str = "access") -> dict:
+    cache_key = hashlib.sha256(token.encode()).hexdigest()[:32]  # Never keep raw tokens in memory
+    with _token_cache_lock:
+        payload = _token_cache.get(cache_key)
+    if payload is not None and payload["exp"] > time.time() and payload.get("type") == token_type:
+        return payload
+
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[ALGORITHM])
+        if isinstance(payload.get("exp"), (int, float)):
+            with _token_cache_lock:
+                _token_cache[cache_key] = payload
         if payload.get("type") != token_type:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token type"
             )
         return payload
-    except JWTError:
+    except PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
-        )
\ No newline at end of file
+        )
+
+
+def list_response(adapter: TypeAdapter, items: Any) -> ORJSONResponse:
+    """Validate and serialize a list response through a prebuilt TypeAdapter, encoded with orjson"""
+    return ORJSONResponse(content=adapter.dump_python(adapter.validate_python(items), mode="json"))
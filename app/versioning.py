@@ -0,0 +1,34 @@
+from functools import lru_cache
+from typing import Tuple
+
+
+def _parse_part(part: str) -> int:
+    try:
+        return int(part)
+    except ValueError:
+        return 0
+
+
+@lru_cache(maxsize=512)
+def _parse_version(v: str) -> Tuple[int, ...]:
+    """Parse a version string like 'v1.2.3' into a tuple of ints (non-numeric parts become 0)"""
+    if v[:1] in ('v', 'V'):
+        v = v[1:]
+    return tuple(_parse_part(part) for part in v.split('.'))
+
+
+@lru_cache(maxsize=1024)
+def version_compare(version1: str, version2: str) -> int:
+    """
+    Compare two version strings (memoized - app/required versions come from a tiny set)
+    Returns: 1 if version1 > version2, 0 if equal, -1 if version1 < version2
+    """
+    v1_parts = _parse_version(version1)
+    v2_parts = _parse_version(version2)
+
+    # Pad shorter version with zeros
+    max_len = max(len(v1_parts), len(v2_parts))
+    v1_parts += (0,) * (max_len - len(v1_parts))
+    v2_parts += (0,) * (max_len - len(v2_parts))
+
+    return (v1_parts > v2_parts) - (v1_parts < v2_parts)
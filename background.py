@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Runs the singleton background work (Telegram bot polling, leaderboard and translation batch
+schedulers) for deployments whose web workers are started with RUN_BACKGROUND_TASKS=0
+"""
+import asyncio
+
+from app.telegram_bot import start_bot, close_bot, USE_WEBHOOK
+from app.redis_client import close_redis
+from app.routers.leaderboard import start_leaderboard_scheduler, stop_leaderboard_scheduler
+from app.routers.translation import start_translation_batch_scheduler, stop_translation_batch_scheduler, close_openai_client
+
+
+async def main():
+    # In webhook mode the web workers receive bot updates themselves
+    if not USE_WEBHOOK:
+        await start_bot()
+    start_leaderboard_scheduler()
+    start_translation_batch_scheduler()
+    print("✅ Background tasks started")
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        stop_translation_batch_scheduler()
+        stop_leaderboard_scheduler()
+        await close_bot()
+        await close_openai_client()
+        await close_redis()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -1,24 +1,56 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
 import uvicorn
+import asyncio
 import os
+import sys
 
-from app.database import init_db
+from app.database import init_db, WEB_CONCURRENCY
 from app.routers import auth, profile, education, quiz, grammar_topics, admin, progress, leaderboard, translation, subscription
-from app.routers import dashboard
-from app.telegram_bot import start_bot
+from app.routers import dashboard, bot_webhook
+from app.telegram_bot import start_bot, close_bot, USE_WEBHOOK
 from app.redis_client import close_redis
 from app.routers.leaderboard import start_leaderboard_scheduler, stop_leaderboard_scheduler
+from app.routers.subscription import start_cache_invalidation_listener, stop_cache_invalidation_listener
+from app.routers.translation import start_translation_batch_scheduler, stop_translation_batch_scheduler, close_openai_client, load_glossary
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# uvloop (from uvicorn[standard]) speeds up asyncpg, httpx and redis I/O; it has no Windows build
+EVENT_LOOP = "asyncio" if sys.platform == "win32" else "uvloop"
+
+# Bot polling and the schedulers must run in exactly one process. Multi-worker deployments start
+# web workers with RUN_BACKGROUND_TASKS=0 and run background.py once alongside them
+RUN_BACKGROUND_TASKS = os.getenv("RUN_BACKGROUND_TASKS", "1") == "1"
+
 # Global hardcoded passkey for testing purposes - loaded from .env
 TEST_PASSKEY = os.getenv("TEST_PASSKEY")
 
 
+async def setup_database():
+    try:
+        await init_db()
+        print("✅ Database initialized successfully")
+    except Exception as e:
+        print(f"❌ Database initialization failed: {e}")
+        print("⚠️  Server will start without database connection")
+
+
+async def setup_bot():
+    # Webhook updates can arrive at any worker, so every worker runs the bot in webhook mode
+    if RUN_BACKGROUND_TASKS or USE_WEBHOOK:
+        try:
+            await start_bot()
+            print("✅ Telegram bot started successfully")
+        except Exception as e:
+            print(f"❌ Telegram bot failed to start: {e}")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Create storage directories
@@ -27,26 +59,56 @@ async def lifespan(app: FastAPI):
     os.makedirs(f"{storage_path}/word_audio", exist_ok=True)
     print(f"✅ Storage directories created: {storage_path}")
     
+    # Database setup and bot startup are independent network round-trips, so run them together
+    await asyncio.gather(setup_database(), setup_bot())
+    
+    if RUN_BACKGROUND_TASKS:
+        try:
+            start_leaderboard_scheduler()
+            print("✅ Leaderboard scheduler started")
+        except Exception as e:
+            print(f"❌ Leaderboard scheduler failed: {e}")
+    
     try:
-        await init_db()
-        print("✅ Database initialized successfully")
+        word_count = await load_glossary()
+        print(f"✅ Translation glossary loaded ({word_count} words)")
     except Exception as e:
-        print(f"❌ Database initialization failed: {e}")
-        print("⚠️  Server will start without database connection")
+        print(f"❌ Translation glossary failed to load: {e}")
+    
+    if RUN_BACKGROUND_TASKS:
+        try:
+            start_translation_batch_scheduler()
+            print("✅ Translation batch scheduler started")
+        except Exception as e:
+            print(f"❌ Translation batch scheduler failed: {e}")
     
     try:
-        await start_bot()
-        print("✅ Telegram bot started successfully")
+        start_cache_invalidation_listener()
+        print("✅ Cache invalidation listener started")
     except Exception as e:
-        print(f"❌ Telegram bot failed to start: {e}")
+        print(f"❌ Cache invalidation listener failed: {e}")
+    
+    yield
     
     try:
-        start_leaderboard_scheduler()
-        print("✅ Leaderboard scheduler started")
+        stop_translation_batch_scheduler()
     except Exception as e:
-        print(f"❌ Leaderboard scheduler failed: {e}")
+        print(f"❌ Error stopping translation batch scheduler: {e}")
     
-    yield
+    try:
+        stop_cache_invalidation_listener()
+    except Exception as e:
+        print(f"❌ Error stopping cache invalidation listener: {e}")
+    
+    try:
+        await close_openai_client()
+    except Exception as e:
+        print(f"❌ Error closing OpenAI client: {e}")
+    
+    try:
+        await close_bot()
+    except Exception as e:
+        print(f"❌ Error closing Telegram bot client: {e}")
     
     try:
         stop_leaderboard_scheduler()
@@ -63,7 +125,8 @@ app = FastAPI(
     title="Educational Platform API",
     description="Simplified Backend API for educational platform with Telegram authentication",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
@@ -74,10 +137,14 @@ app.add_middleware(
         "https://lruss.uz"
     ],
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
+    allow_headers=["Authorization", "Content-Type", "X-Requested-With", "If-None-Match"],
+    max_age=86400,  # Let browsers cache preflight responses (they may cap this lower)
 )
 
+# Compress large JSON payloads (content lists, admin exports); small responses are sent as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Simplified API Routes
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(profile.router, prefix="/api/profile", tags=["profile"])
@@ -90,6 +157,9 @@ app.include_router(leaderboard.router, prefix="/api/leaderboard", tags=["leaderb
 app.include_router(translation.router, prefix="/api/translation", tags=["translation"])
 app.include_router(subscription.router, prefix="/api/subscription", tags=["subscription"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
+if USE_WEBHOOK:
+    # Only exposed in webhook mode; in polling mode updates never come over HTTP
+    app.include_router(bot_webhook.router, prefix="/api/telegram", tags=["telegram"])
 
 # Mount static files for photo serving
 storage_path = os.getenv("STORAGE_PATH", "/tmp/persistent_storage")
@@ -102,4 +172,10 @@ async def root():
 
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    if WEB_CONCURRENCY > 1:
+        # Workers inherit this; background work then runs only in background.py
+        os.environ.setdefault("RUN_BACKGROUND_TASKS", "0")
+        if os.environ["RUN_BACKGROUND_TASKS"] != "1":
+            print(f"⚠️  {WEB_CONCURRENCY} workers without background tasks: run `python background.py` once "
+                  "for bot polling and the schedulers")
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, workers=WEB_CONCURRENCY, loop=EVENT_LOOP, http="httptools")
\ No newline at end of file
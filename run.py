@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 import asyncio
 import uvicorn
-from main import app
+from main import app, EVENT_LOOP
 
 if __name__ == "__main__":
     print("🚀 Starting Educational Platform API...")
@@ -14,5 +14,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        loop=EVENT_LOOP,
+        http="httptools"
     )
\ No newline at end of file
@@ -73,34 +73,43 @@ async def create_mock_users():
                 session.add(pack)
                 await session.flush()
             
-            for user_data in mock_users:
-                # Check if user already exists
-                existing_user = await session.execute(
-                    select(User).where(User.phone_number == user_data["phone_number"])
+            # Find already existing users in one query
+            existing_result = await session.execute(
+                select(User.phone_number).where(
+                    User.phone_number.in_([user_data["phone_number"] for user_data in mock_users])
                 )
-                if existing_user.scalar_one_or_none():
-                    print(f"User with phone {user_data['phone_number']} already exists, skipping...")
-                    continue
-                
-                # Create user
-                user = User(
+            )
+            existing_phones = set(existing_result.scalars())
+            for phone_number in existing_phones:
+                print(f"User with phone {phone_number} already exists, skipping...")
+            
+            new_users = [user_data for user_data in mock_users if user_data["phone_number"] not in existing_phones]
+            
+            # Create users in one flush so their ids are available for progress rows
+            users = [
+                User(
                     telegram_id=user_data["telegram_id"],
                     phone_number=user_data["phone_number"],
                     first_name=user_data["first_name"],
                     last_name=user_data["last_name"]
                 )
-                session.add(user)
-                await session.flush()
-                
-                # Create user progress with points
-                progress = UserProgress(
+                for user_data in new_users
+            ]
+            session.add_all(users)
+            await session.flush()
+            
+            # Create user progress with points
+            session.add_all([
+                UserProgress(
                     user_id=user.id,
                     pack_id=pack.id,
                     best_score=85,  # Mock score
                     total_points=user_data["points"]
                 )
-                session.add(progress)
-                
+                for user, user_data in zip(users, new_users)
+            ])
+            
+            for user_data in new_users:
                 print(f"Created user: {user_data['first_name']} {user_data['last_name']} with {user_data['points']} points")
             
             await session.commit()
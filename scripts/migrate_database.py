@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Script to bring an existing database up to the current models.
+create_all only creates missing tables, so columns, constraints and indexes added to
+existing tables are applied here. Every step is idempotent and safe to re-run.
+"""
+import sys
+import asyncio
+from pathlib import Path
+
+# Add the parent directory to sys.path to import app modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.database import engine
+from sqlalchemy import text
+
+
+async def table_exists(conn, table: str) -> bool:
+    return await conn.scalar(text("SELECT to_regclass(:table)"), {"table": table}) is not None
+
+
+async def migrate_translation_input_hash():
+    """Add translations.input_hash and move unique_translation onto it"""
+    print("🔑 Migrating translations.input_hash...")
+
+    async with engine.begin() as conn:
+        if not await table_exists(conn, "translations"):
+            print("   - Skipping (table doesn't exist yet)")
+            return
+
+        await conn.execute(text(
+            "ALTER TABLE translations ADD COLUMN IF NOT EXISTS input_hash bytea "
+            "GENERATED ALWAYS AS (decode(md5(input_text), 'hex')) STORED NOT NULL"
+        ))
+
+        constraint = await conn.scalar(text(
+            "SELECT pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conname = 'unique_translation' AND conrelid = 'translations'::regclass"
+        ))
+        if constraint and "input_hash" in constraint:
+            print("   - unique_translation already covers input_hash")
+            return
+
+        # Same transaction, so inserts never see the table without its ON CONFLICT arbiter
+        await conn.execute(text("ALTER TABLE translations DROP CONSTRAINT IF EXISTS unique_translation"))
+        await conn.execute(text(
+            "ALTER TABLE translations ADD CONSTRAINT unique_translation UNIQUE (input_hash, target_language)"
+        ))
+
+    print("✅ translations.input_hash migrated")
+
+
+async def migrate_subscription_indexes():
+    """Create the partial indexes for active subscription lookups"""
+    print("📇 Creating active subscription indexes...")
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block, and it does not
+    # block writes to user_subscriptions while the index builds
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        if not await table_exists(conn, "user_subscriptions"):
+            print("   - Skipping (table doesn't exist yet)")
+            return
+
+        await conn.execute(text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_usersub_active "
+            "ON user_subscriptions (user_id, end_date DESC) WHERE is_active = true"
+        ))
+        await conn.execute(text(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_usersub_created_active "
+            "ON user_subscriptions (created_at) WHERE is_active = true"
+        ))
+
+    print("✅ Active subscription indexes created")
+
+
+async def main():
+    await migrate_translation_input_hash()
+    await migrate_subscription_indexes()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,7 +2,8 @@
 """
 Script to reset database with fresh content from JSON files
 """
-import json
+import ijson
+import orjson
 import sys
 import os
 import asyncio
@@ -13,7 +14,9 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from app.database import AsyncSessionLocal
 from app.models import Module, Lesson, Pack, Word, Grammar, GrammarTopic, PackType, GrammarType
-from sqlalchemy import text
+from sqlalchemy import text, insert
+
+INSERT_BATCH_SIZE = 1000
 
 
 async def clean_database():
@@ -32,15 +35,20 @@ async def clean_database():
             "modules"
         ]
         
+        existing_tables = []
         for table in tables_to_clean:
-            try:
-                print(f"   - Deleting {table}...")
-                await db.execute(text(f"DELETE FROM {table}"))
-            except Exception as e:
-                if "does not exist" in str(e):
-                    print(f"   - Skipping {table} (table doesn't exist yet)")
-                else:
-                    raise e
+            if await db.scalar(text("SELECT to_regclass(:table)"), {"table": table}) is None:
+                print(f"   - Skipping {table} (table doesn't exist yet)")
+            else:
+                print(f"   - Truncating {table}...")
+                existing_tables.append(table)
+
+        # One TRUNCATE for all tables: satisfies the foreign keys between them without CASCADE
+        # and frees the space immediately instead of leaving dead rows for VACUUM. Sequences are
+        # not restarted: the seed inserts explicit ids, so resetting them would make the next
+        # admin-created row collide with id 1
+        if existing_tables:
+            await db.execute(text(f"TRUNCATE TABLE {', '.join(existing_tables)}"))
 
         await db.commit()
 
@@ -53,17 +61,19 @@ async def load_modules():
 
     modules_file = Path(__file__).parent.parent / "content" / "modules.json"
 
-    with open(modules_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with open(modules_file, 'rb') as f:
+        data = orjson.loads(f.read())
 
     async with AsyncSessionLocal() as db:
-        for module_data in data['modules']:
-            module = Module(
-                id=module_data['id'],
-                title=module_data['title'],
-                order=module_data['order']
-            )
-            db.add(module)
+        # One bulk INSERT instead of tracking each row in the ORM unit of work
+        await db.execute(insert(Module), [
+            {
+                'id': module_data['id'],
+                'title': module_data['title'],
+                'order': module_data['order']
+            }
+            for module_data in data['modules']
+        ])
 
         await db.commit()
 
@@ -76,19 +86,20 @@ async def load_lessons():
 
     lessons_file = Path(__file__).parent.parent / "content" / "lessons.json"
 
-    with open(lessons_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with open(lessons_file, 'rb') as f:
+        data = orjson.loads(f.read())
 
     async with AsyncSessionLocal() as db:
-        for lesson_data in data['lessons']:
-            lesson = Lesson(
-                id=lesson_data['id'],
-                title=lesson_data['title'],
-                description=lesson_data['description'],
-                module_id=lesson_data['module_id'],
-                order=lesson_data['order']
-            )
-            db.add(lesson)
+        await db.execute(insert(Lesson), [
+            {
+                'id': lesson_data['id'],
+                'title': lesson_data['title'],
+                'description': lesson_data['description'],
+                'module_id': lesson_data['module_id'],
+                'order': lesson_data['order']
+            }
+            for lesson_data in data['lessons']
+        ])
 
         await db.commit()
 
@@ -108,59 +119,63 @@ async def load_detailed_content():
         print("⚠️  Module 1 detailed content not found, skipping...")
         return
 
-    with open(module1_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    # Stream lessons from the file and insert rows in bulk batches. Every flush writes all
+    # buffered tables in parent-first order so foreign keys are always satisfied
+    tables = ((Pack, []), (Word, []), (Grammar, []), (GrammarTopic, []))
+    packs, words, grammars, topics = (rows for _, rows in tables)
 
-    async with AsyncSessionLocal() as db:
-        for lesson_data in data['lessons']:
-            for pack_data in lesson_data.get('packs', []):
-                # Create pack
-                pack = Pack(
-                    id=pack_data['id'],
-                    title=pack_data['title'],
-                    lesson_id=pack_data['lesson_id'],
-                    type=PackType(pack_data['type']),
-                    word_count=pack_data.get('word_count')
-                )
-                db.add(pack)
-                await db.flush()  # Get the ID
-
-                # Add words if this is a word pack
-                if 'words' in pack_data:
-                    for word_data in pack_data['words']:
-                        word = Word(
-                            id=word_data['id'],
-                            pack_id=word_data['pack_id'],
-                            ru_text=word_data['ru_text'],
-                            uz_text=word_data['uz_text']
-                        )
-                        db.add(word)
-
-                # Add grammars if this is a grammar pack
-                if 'grammars' in pack_data:
-                    for grammar_data in pack_data['grammars']:
-                        grammar = Grammar(
-                            id=grammar_data['id'],
-                            pack_id=grammar_data['pack_id'],
-                            type=GrammarType(grammar_data['type']),
-                            question_text=grammar_data.get('question_text'),
-                            options=grammar_data.get('options'),
-                            correct_option=grammar_data.get('correct_option'),
-                            sentence=grammar_data.get('sentence')
-                        )
-                        db.add(grammar)
-
-                # Add grammar topics
-                if 'grammar_topics' in pack_data:
-                    for topic_data in pack_data['grammar_topics']:
-                        topic = GrammarTopic(
-                            id=topic_data['id'],
-                            pack_id=topic_data['pack_id'],
-                            video_url=topic_data.get('video_url'),
-                            markdown_text=topic_data.get('markdown_text')
-                        )
-                        db.add(topic)
+    async def flush_rows(db):
+        for model, rows in tables:
+            if rows:
+                await db.execute(insert(model), rows)
+                rows.clear()
 
+    async with AsyncSessionLocal() as db:
+        with open(module1_file, 'rb') as f:
+            for lesson_data in ijson.items(f, 'lessons.item'):
+                for pack_data in lesson_data.get('packs', []):
+                    packs.append({
+                        'id': pack_data['id'],
+                        'title': pack_data['title'],
+                        'lesson_id': pack_data['lesson_id'],
+                        'type': PackType(pack_data['type']),
+                        'word_count': pack_data.get('word_count')
+                    })
+
+                    # Add words if this is a word pack
+                    for word_data in pack_data.get('words', []):
+                        words.append({
+                            'id': word_data['id'],
+                            'pack_id': word_data['pack_id'],
+                            'ru_text': word_data['ru_text'],
+                            'uz_text': word_data['uz_text']
+                        })
+
+                    # Add grammars if this is a grammar pack
+                    for grammar_data in pack_data.get('grammars', []):
+                        grammars.append({
+                            'id': grammar_data['id'],
+                            'pack_id': grammar_data['pack_id'],
+                            'type': GrammarType(grammar_data['type']),
+                            'question_text': grammar_data.get('question_text'),
+                            'options': grammar_data.get('options'),
+                            'correct_option': grammar_data.get('correct_option'),
+                            'sentence': grammar_data.get('sentence')
+                        })
+
+                    # Add grammar topics
+                    for topic_data in pack_data.get('grammar_topics', []):
+                        topics.append({
+                            'id': topic_data['id'],
+                            'pack_id': topic_data['pack_id'],
+                            'video_url': topic_data.get('video_url'),
+                            'markdown_text': topic_data.get('markdown_text')
+                        })
+
+                if sum(len(rows) for _, rows in tables) >= INSERT_BATCH_SIZE:
+                    await flush_rows(db)
+
+        await flush_rows(db)
         await db.commit()
 
     print("✅ Loaded detailed content for Module 1")